@@ -1,43 +1,192 @@
 import os
-import json
 import uuid
 import time
+import random
+import socket
+import select
+import itertools
 import threading
-import queue as thread_queue
 import subprocess
 import signal
 import atexit
-import psutil
+import functools
+import orjson
+# Before monkey_patch: inotify_simple binds select.poll, which eventlet removes
+from inotify_simple import INotify, flags
 
 import eventlet
 
 eventlet.monkey_patch()
 
+from eventlet.queue import Queue as GreenQueue
+
 import requests
-from flask import Flask, request, render_template, jsonify
-from flask_socketio import SocketIO
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+from flask import Flask, Response, request, render_template, jsonify
+from flask.json.provider import JSONProvider
+from flask_socketio import SocketIO, emit
 
 
 CLOUD_FUNCTION_URL = 'https://get-youtube-audio-364938401510.southamerica-east1.run.app'
 MPV_SOCKET = '/tmp/mpv.sock'
+MPV_PID_FILE = '/tmp/mpv.pid'  # PID of the MPV we started, survives server restarts
+
+# Keep-alive session for the Cloud Function so calls reuse the TCP/TLS connection
+cloud_session = requests.Session()
+cloud_session.mount('https://', HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=4,
+    # read=False: a POST that timed out may still be running in the Cloud Function, don't resend it
+    max_retries=Retry(total=2, connect=2, read=False, backoff_factor=0.2, status_forcelist=[502, 503, 504],
+                      allowed_methods=['POST'], raise_on_status=False),
+))
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson (jsonify, request.get_json)"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype='application/json')
+
+
+class OrjsonSocketJSON:
+    """json module stand-in for python-socketio, which expects dumps() to return str"""
+
+    @staticmethod
+    def dumps(obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    @staticmethod
+    def loads(s, **kwargs):
+        return orjson.loads(s)
+
 
 app = Flask(__name__, template_folder='templates')
-socketio = SocketIO(app, async_mode='eventlet', cors_allowed_origins='*')
+app.json = OrjsonProvider(app)
+socketio = SocketIO(app, async_mode='eventlet', cors_allowed_origins='*', json=OrjsonSocketJSON)
 
 # In-memory queue and playback state
-submission_queue: thread_queue.Queue = thread_queue.Queue()
+submission_queue: GreenQueue = GreenQueue()
+submission_pool = eventlet.GreenPool(4)  # Cloud Function fetches in flight at once
 queue_items = []  # List[dict]: {'id','url','status','details'}
+queue_index = {}  # Dict[str, int]: item id -> position in queue_items
+_queue_snapshot: tuple = ()  # Immutable copy of queue_items for readers, replaced on every change
+_queue_epoch = uuid.uuid4().hex[:8]  # Keeps ETags from a previous run from matching
+_queue_version = 0  # Bumped on every change that affects the rendered queue
+_queue_render_cache = (None, None)  # (version, rendered queue.html)
 playback_state = {
     'current_id': None,
-    'current_details': None,  # Store current track details separately
+    'current_payload': None,  # Pre-serialized 'current' part of the status, set per track
     'paused': True,
     'volume': 50.0,
     'time': 0.0,
     'duration': 0.0,
 }
 autoplay_enabled = True  # Toggle for automatic next track
+_last_status = None  # Last status payload emitted by poll_mpv_state
+_last_status_key = None  # Rounded (paused, time, duration, volume, current_id) of _last_status
 mpv_process = None  # Track MPV process
 mpv_start_lock = threading.Lock()  # Prevent concurrent MPV starts
+autoplay_lock = threading.Lock()  # Only one finished submission may start autoplay
+_mpv_sock = None  # Persistent connection to the MPV IPC socket
+_mpv_rx = bytearray(65536)  # Receive buffer reused for every read from MPV
+_mpv_rx_len = 0  # Bytes at the start of _mpv_rx not yet consumed
+_mpv_lock = threading.Lock()  # Serialize request/reply exchanges on _mpv_sock
+_mpv_request_ids = itertools.count(1)
+_sound_server = None  # 'pipewire' or 'pulse' once pactl has reported one
+_audio_diagnosed = False  # Startup failures only run the audio diagnostics once
+
+
+def kill_previous_mpv():
+    """Terminate the MPV recorded in MPV_PID_FILE, returns its PID if one was running"""
+    try:
+        with open(MPV_PID_FILE, 'r') as f:
+            pid = int(f.read().strip())
+        # The PID may have been reused since the file was written
+        with open(f'/proc/{pid}/comm', 'r') as f:
+            if f.read().strip() != 'mpv':
+                return None
+        os.kill(pid, signal.SIGTERM)
+        return pid
+    except (OSError, ValueError):
+        return None
+
+
+@functools.lru_cache(maxsize=1)
+def detect_raspberry_pi():
+    """Return (is_raspberry_pi, rpi_model), /proc/cpuinfo doesn't change at runtime"""
+    is_raspberry_pi = False
+    rpi_model = None
+    try:
+        with open('/proc/cpuinfo', 'r') as f:
+            cpuinfo = f.read().lower()
+            # More precise Raspberry Pi detection
+            is_raspberry_pi = ('raspberry pi' in cpuinfo or 'bcm2835' in cpuinfo or 'bcm2836' in cpuinfo or 'bcm2837' in cpuinfo or 'bcm2711' in cpuinfo) and 'arm' in cpuinfo
+            if is_raspberry_pi:
+                if 'pi zero' in cpuinfo:
+                    rpi_model = 'zero'
+                elif 'raspberry pi' in cpuinfo:
+                    rpi_model = 'standard'
+    except:
+        pass
+    return is_raspberry_pi, rpi_model
+
+
+def detect_audio_env():
+    """Return (is_raspberry_pi, rpi_model, has_pipewire, has_pulse) for configuring MPV"""
+    global _sound_server
+    is_raspberry_pi, rpi_model = detect_raspberry_pi()
+    
+    # The Pi uses MPV's automatic audio detection, so only desktops need pactl. A
+    # found sound server is remembered; a missing one is probed again next time
+    # since it may come up after the music player at boot.
+    if not is_raspberry_pi and _sound_server is None:
+        try:
+            result = subprocess.run(['pactl', 'info'], capture_output=True, text=True, timeout=2)
+            if result.returncode == 0:
+                _sound_server = 'pipewire' if 'pipewire' in result.stdout.lower() else 'pulse'
+        except:
+            pass
+    
+    return is_raspberry_pi, rpi_model, _sound_server == 'pipewire', _sound_server == 'pulse'
+
+
+def wait_for_mpv_socket(inotify, timeout: float):
+    """Block until MPV creates MPV_SOCKET or exits, returns (socket_created, exit_code)"""
+    socket_name = os.path.basename(MPV_SOCKET)
+    # A pidfd becomes readable when MPV exits, so an early death wakes us up as well
+    try:
+        exit_fd = os.pidfd_open(mpv_process.pid)
+    except (AttributeError, OSError):
+        exit_fd = None
+    
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            exit_code = mpv_process.poll()
+            if exit_code is not None:
+                return False, exit_code
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False, None
+            
+            if exit_fd is not None:
+                readable, _, _ = select.select([inotify, exit_fd], [], [], remaining)
+            else:
+                # No pidfd support, wake up regularly to check on MPV instead
+                readable, _, _ = select.select([inotify], [], [], min(remaining, 0.1))
+            if inotify in readable and any(event.name == socket_name for event in inotify.read(timeout=0)):
+                return True, None
+    finally:
+        if exit_fd is not None:
+            os.close(exit_fd)
 
 
 def start_mpv():
@@ -47,39 +196,21 @@ def start_mpv():
     # Prevent concurrent MPV starts
     with mpv_start_lock:
         try:
-            # Kill any existing MPV processes to avoid conflicts
-            killed_processes = []
-            for proc in psutil.process_iter(['pid', 'name']):
-                if proc.info['name'] == 'mpv':
-                    try:
-                        proc.kill()
-                        killed_processes.append(proc.pid)
-                    except:
-                        pass
+            # Kill the MPV we started before (this run or a previous one) to avoid conflicts
+            killed_pid = kill_previous_mpv()
+            if killed_pid:
+                app.logger.info(f"Killed existing MPV process: {killed_pid}")
+                time.sleep(0.5)  # Give the process time to die
             
-            if killed_processes:
-                app.logger.info(f"Killed existing MPV processes: {killed_processes}")
-                time.sleep(0.5)  # Give processes time to die
+            # Any open IPC connection belonged to the old process
+            with _mpv_lock:
+                _mpv_disconnect()
             
             # Remove existing socket file if it exists
             if os.path.exists(MPV_SOCKET):
                 os.remove(MPV_SOCKET)
         
-            # Detect system type
-            is_raspberry_pi = False
-            rpi_model = None
-            try:
-                with open('/proc/cpuinfo', 'r') as f:
-                    cpuinfo = f.read().lower()
-                    # More precise Raspberry Pi detection
-                    is_raspberry_pi = ('raspberry pi' in cpuinfo or 'bcm2835' in cpuinfo or 'bcm2836' in cpuinfo or 'bcm2837' in cpuinfo or 'bcm2711' in cpuinfo) and 'arm' in cpuinfo
-                    if is_raspberry_pi:
-                        if 'pi zero' in cpuinfo:
-                            rpi_model = 'zero'
-                        elif 'raspberry pi' in cpuinfo:
-                            rpi_model = 'standard'
-            except:
-                pass
+            is_raspberry_pi, rpi_model, has_pipewire, has_pulse = detect_audio_env()
             
             # Build MPV command with appropriate audio settings
             mpv_cmd = [
@@ -95,32 +226,11 @@ def start_mpv():
             if is_raspberry_pi:
                 app.logger.info(f"Detected Raspberry Pi ({rpi_model}), configuring audio...")
                 
-                # Check available audio devices first
-                audio_devices = []
-                try:
-                    result = subprocess.run(['aplay', '-l'], capture_output=True, text=True, timeout=3)
-                    if result.returncode == 0:
-                        audio_devices = result.stdout.lower()
-                except:
-                    pass
-                
                 # Use automatic audio detection for Raspberry Pi (simpler and more reliable)
                 app.logger.info("Using automatic audio detection for Raspberry Pi")
             else:
                 # Desktop/non-RPi system
-                # Detect audio system and configure accordingly
-                has_pipewire = False
-                has_pulse = False
-                try:
-                    # Check for PipeWire
-                    result = subprocess.run(['pactl', 'info'], capture_output=True, text=True, timeout=2)
-                    if result.returncode == 0 and 'pipewire' in result.stdout.lower():
-                        has_pipewire = True
-                    elif result.returncode == 0:
-                        has_pulse = True
-                except:
-                    pass
-                
+                # Configure according to the detected audio system
                 if has_pipewire:
                     app.logger.info("Detected PipeWire audio system...")
                     mpv_cmd.extend([
@@ -142,43 +252,41 @@ def start_mpv():
             
             app.logger.info(f"Starting MPV with command: {' '.join(mpv_cmd)}")
             
-            # Start MPV - suppress both stdout and stderr for stability
-            mpv_process = subprocess.Popen(
-                mpv_cmd,
-                stdout=subprocess.DEVNULL, 
-                stderr=subprocess.DEVNULL
-            )
+            # Watch the socket's directory before starting MPV so its creation can't be missed
+            with INotify() as inotify:
+                inotify.add_watch(os.path.dirname(MPV_SOCKET), flags.CREATE)
+                
+                # Start MPV - suppress both stdout and stderr for stability
+                mpv_process = subprocess.Popen(
+                    mpv_cmd,
+                    stdout=subprocess.DEVNULL, 
+                    stderr=subprocess.DEVNULL
+                )
+                with open(MPV_PID_FILE, 'w') as f:
+                    f.write(str(mpv_process.pid))
+                
+                # Wait for socket to be created with better error detection
+                socket_created, exit_code = wait_for_mpv_socket(inotify, timeout=3.0)
             
-            # Wait for socket to be created with better error detection
-            socket_created = False
-            for i in range(30):  # Wait up to 3 seconds in 0.1s increments
-                time.sleep(0.1)
+            # Check if process died early
+            if exit_code is not None:
+                app.logger.error(f"MPV process died immediately with exit code: {exit_code}")
                 
-                # Check if process died early
-                if mpv_process.poll() is not None:
-                    exit_code = mpv_process.poll()
-                    app.logger.error(f"MPV process died immediately with exit code: {exit_code}")
-                    
-                    # Try to provide more specific error messages
-                    if exit_code == 1:
-                        app.logger.error("MPV failed - likely audio configuration issue")
-                    elif exit_code == -9:
-                        app.logger.error("MPV was killed - possible resource constraint")
-                    else:
-                        app.logger.error(f"MPV failed with unexpected exit code: {exit_code}")
-                    
-                    # Run diagnostics to help troubleshoot
-                    run_audio_diagnostics()
-                    raise Exception(f"MPV process died immediately (exit code: {exit_code})")
+                # Try to provide more specific error messages
+                if exit_code == 1:
+                    app.logger.error("MPV failed - likely audio configuration issue")
+                elif exit_code == -9:
+                    app.logger.error("MPV was killed - possible resource constraint")
+                else:
+                    app.logger.error(f"MPV failed with unexpected exit code: {exit_code}")
                 
-                # Check if socket was created
-                if os.path.exists(MPV_SOCKET):
-                    socket_created = True
-                    break
+                # Run diagnostics to help troubleshoot
+                run_startup_diagnostics()
+                raise Exception(f"MPV process died immediately (exit code: {exit_code})")
             
             if not socket_created:
                 app.logger.error("MPV socket was not created within timeout period")
-                run_audio_diagnostics()
+                run_startup_diagnostics()
                 raise Exception(f"MPV socket {MPV_SOCKET} was not created")
             
             app.logger.info(f"MPV started successfully with PID {mpv_process.pid}")
@@ -205,6 +313,16 @@ def start_mpv():
             return False
 
 
+def run_startup_diagnostics():
+    """Diagnose a failed MPV start, only the first failure of this process"""
+    global _audio_diagnosed
+    if _audio_diagnosed:
+        app.logger.info("Audio diagnostics already ran, see /debug-audio to run them again")
+        return
+    _audio_diagnosed = True
+    run_audio_diagnostics()
+
+
 def run_audio_diagnostics():
     """Run comprehensive audio diagnostics to help troubleshoot issues"""
     app.logger.info("=== AUDIO DIAGNOSTICS ===")
@@ -310,21 +428,21 @@ def ensure_mpv_running():
         app.logger.warning("MPV socket missing, attempting to restart MPV...")
         return start_mpv()
     
-    # Test responsiveness with a direct socat call (avoid circular dependency)
-    try:
-        proc = subprocess.run(
-            ['socat', '-', f'UNIX-CONNECT:{MPV_SOCKET}'],
-            input='{"command":["get_property","idle-active"]}\n',
-            text=True,
-            capture_output=True,
-            timeout=2.0,
-        )
-        if proc.returncode != 0:
-            raise Exception(f"socat failed: {proc.stderr}")
-        return True
-    except Exception as e:
-        app.logger.warning(f"MPV not responsive: {e}, attempting to restart...")
-        return start_mpv()
+    # Cheap liveness check on the persistent connection: a readable socket
+    # that yields no data means MPV hung up on us
+    responsive = True
+    with _mpv_lock:
+        if _mpv_sock is not None:
+            try:
+                readable, _, _ = select.select([_mpv_sock], [], [], 0)
+                if readable and not _mpv_sock.recv(1, socket.MSG_PEEK):
+                    raise ConnectionResetError("MPV closed the IPC connection")
+            except Exception as e:
+                app.logger.warning(f"MPV not responsive: {e}, attempting to restart...")
+                _mpv_disconnect()
+                responsive = False
+    
+    return responsive or start_mpv()
 
 
 def cleanup_on_exit():
@@ -338,6 +456,8 @@ def cleanup_on_exit():
                 mpv_process.kill()
         if os.path.exists(MPV_SOCKET):
             os.remove(MPV_SOCKET)
+        if os.path.exists(MPV_PID_FILE):
+            os.remove(MPV_PID_FILE)
     except Exception as e:
         app.logger.error(f"Error during cleanup: {e}")
 
@@ -354,65 +474,194 @@ signal.signal(signal.SIGINT, signal_handler)
 signal.signal(signal.SIGTERM, signal_handler)
 
 
-def _run_socat_send(message: dict) -> dict:
+def _mpv_disconnect():
+    """Drop the persistent MPV connection so the next request reconnects (hold _mpv_lock)"""
+    global _mpv_sock, _mpv_rx_len
+    if _mpv_sock is not None:
+        try:
+            _mpv_sock.close()
+        except OSError:
+            pass
+    _mpv_sock = None
+    _mpv_rx_len = 0
+
+
+def _connect_mpv():
+    """Open the persistent MPV connection (hold _mpv_lock)"""
+    global _mpv_sock
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    s.settimeout(2.0)
+    try:
+        s.connect(MPV_SOCKET)
+    except OSError:
+        s.close()
+        raise
+    _mpv_sock = s
+    return s
+
+
+def _mpv_read_message() -> dict:
+    """Read and parse the next JSON message from MPV (hold _mpv_lock)"""
+    global _mpv_rx_len
+    scan_from = 0
+    while True:
+        newline = _mpv_rx.find(b'\n', scan_from, _mpv_rx_len)
+        if newline == 0:
+            # Blank line, drop it and keep looking
+            _mpv_rx[:_mpv_rx_len - 1] = _mpv_rx[1:_mpv_rx_len]
+            _mpv_rx_len -= 1
+            continue
+        if newline > 0:
+            break
+        scan_from = _mpv_rx_len
+        if _mpv_rx_len == len(_mpv_rx):
+            # A single message larger than the buffer, grow it (rare)
+            _mpv_rx.extend(bytes(len(_mpv_rx)))
+        received = _mpv_sock.recv_into(memoryview(_mpv_rx)[_mpv_rx_len:])
+        if not received:
+            raise ConnectionResetError("MPV closed the IPC connection")
+        _mpv_rx_len += received
+    
+    # orjson parses straight from the buffer, no intermediate bytes object
+    message = orjson.loads(memoryview(_mpv_rx)[:newline])
+    
+    # Move any following message(s) to the front of the buffer
+    remaining = _mpv_rx_len - newline - 1
+    if remaining:
+        _mpv_rx[:remaining] = _mpv_rx[newline + 1:_mpv_rx_len]
+    _mpv_rx_len = remaining
+    return message
+
+
+def _mpv_exchange(messages: list) -> list:
+    """Pipeline commands in one write and collect replies by request_id (hold _mpv_lock)"""
+    if _mpv_sock is None:
+        _connect_mpv()
+    request_ids = [next(_mpv_request_ids) for _ in messages]
+    _mpv_sock.sendall(b''.join(
+        orjson.dumps({**message, 'request_id': request_id}) + b'\n'
+        for message, request_id in zip(messages, request_ids)
+    ))
+    replies = {}
+    while len(replies) < len(request_ids):
+        reply = _mpv_read_message()
+        # Skip async events and late replies to requests that already timed out
+        request_id = reply.get('request_id')
+        if request_id in request_ids:
+            replies[request_id] = reply
+    return [replies[request_id] for request_id in request_ids]
+
+
+def _mpv_send_many(messages: list) -> list:
     try:
         # Ensure MPV is running before attempting communication
         if not ensure_mpv_running():
             app.logger.error("MPV is not running and failed to start")
-            return {}
+            return [{} for _ in messages]
         
-        proc = subprocess.run(
-            ['socat', '-', f'UNIX-CONNECT:{MPV_SOCKET}'],
-            input=json.dumps(message) + '\n',
-            text=True,
-            capture_output=True,
-            timeout=2.0,
-        )
-        
-        if proc.returncode != 0:
-            app.logger.error(f"socat failed with return code {proc.returncode}: {proc.stderr}")
-            return {}
-            
-        stdout = (proc.stdout or '').strip().splitlines()
-        if not stdout:
-            app.logger.warning("No response from MPV")
-            return {}
-        # mpv replies with one JSON object per line, take the last
-        last_line = stdout[-1].strip()
-        result = json.loads(last_line) if last_line else {}
+        with _mpv_lock:
+            for attempt in range(2):
+                try:
+                    results = _mpv_exchange(messages)
+                    break
+                except (BrokenPipeError, ConnectionResetError):
+                    # MPV dropped the connection (e.g. after a restart), reconnect once
+                    _mpv_disconnect()
+                    if attempt:
+                        raise
+                except Exception:
+                    # Never leave a half-read reply behind for the next caller
+                    _mpv_disconnect()
+                    raise
         
         # Check for MPV errors (but filter out common "property unavailable" when idle)
-        if 'error' in result and result['error'] != 'success':
-            if result['error'] != 'property unavailable':
-                app.logger.error(f"MPV command error: {result}")
+        for result in results:
+            if 'error' in result and result['error'] != 'success':
+                if result['error'] != 'property unavailable':
+                    app.logger.error(f"MPV command error: {result}")
             
-        return result
-    except subprocess.TimeoutExpired:
+        return results
+    except socket.timeout:
         app.logger.error("MPV communication timeout")
-        return {}
+        return [{} for _ in messages]
     except Exception as e:
         app.logger.error(f"Error communicating with MPV: {e}")
-        return {}
+        return [{} for _ in messages]
+
+
+def _mpv_send(message: dict) -> dict:
+    return _mpv_send_many([message])[0]
 
 
 def mpv_command(command_list):
-    return _run_socat_send({'command': command_list})
+    return _mpv_send({'command': command_list})
 
 
 def mpv_get(prop):
-    resp = _run_socat_send({'command': ['get_property', prop]})
+    resp = _mpv_send({'command': ['get_property', prop]})
     return resp.get('data')
 
 
+def mpv_get_many(props) -> dict:
+    """Read several properties in a single IPC round trip"""
+    resps = _mpv_send_many([{'command': ['get_property', prop]} for prop in props])
+    return {prop: resp.get('data') for prop, resp in zip(props, resps)}
+
+
 def mpv_set(prop, value):
-    return _run_socat_send({'command': ['set_property', prop, value]})
+    return _mpv_send({'command': ['set_property', prop, value]})
 
 
 def find_item_index_by_id(item_id: str) -> int:
-    for idx, item in enumerate(queue_items):
-        if item['id'] == item_id:
-            return idx
-    return -1
+    return queue_index.get(item_id, -1)
+
+
+def mark_queue_changed() -> None:
+    global _queue_version, _queue_snapshot
+    _queue_version += 1
+    _queue_snapshot = tuple(queue_items)
+
+
+# All structural changes to queue_items go through these helpers so that
+# queue_index stays in sync; only positions at or after the change are renumbered
+def rebuild_queue_index(start: int = 0) -> None:
+    if start == 0:
+        queue_index.clear()
+    for idx in range(start, len(queue_items)):
+        queue_index[queue_items[idx]['id']] = idx
+
+
+def queue_append(item: dict) -> None:
+    queue_items.append(item)
+    queue_index[item['id']] = len(queue_items) - 1
+    mark_queue_changed()
+
+
+def queue_insert(idx: int, item: dict) -> None:
+    queue_items.insert(idx, item)
+    rebuild_queue_index(idx)
+    mark_queue_changed()
+
+
+def queue_pop(idx: int) -> dict:
+    item = queue_items.pop(idx)
+    del queue_index[item['id']]
+    rebuild_queue_index(idx)
+    mark_queue_changed()
+    return item
+
+
+def queue_swap(i: int, j: int) -> None:
+    queue_items[i], queue_items[j] = queue_items[j], queue_items[i]
+    queue_index[queue_items[i]['id']] = i
+    queue_index[queue_items[j]['id']] = j
+    mark_queue_changed()
+
+
+def queue_clear() -> None:
+    queue_items.clear()
+    queue_index.clear()
+    mark_queue_changed()
 
 
 def play_item(item: dict) -> None:
@@ -430,8 +679,15 @@ def play_item(item: dict) -> None:
         app.logger.error(f"Failed to load file in MPV: {result}")
         return
     
+    # Serialize the track info once here instead of on every status tick
+    current_payload = orjson.Fragment(orjson.dumps({
+        'id': item['id'],
+        'title': details.get('title'),
+        'thumbnail': details.get('thumbnail'),
+        'source': details.get('source'),
+    }))
     playback_state['current_id'] = item['id']
-    playback_state['current_details'] = details  # Store the details
+    playback_state['current_payload'] = current_payload
     playback_state['paused'] = False
     # Set title if available
     title = details.get('title')
@@ -441,7 +697,7 @@ def play_item(item: dict) -> None:
     # Remove the item from the queue when it starts playing
     idx = find_item_index_by_id(item['id'])
     if idx >= 0:
-        removed_item = queue_items.pop(idx)
+        removed_item = queue_pop(idx)
         socketio.emit('item_removed', {'id': item['id']})
     
     # Emit current track info immediately
@@ -450,12 +706,7 @@ def play_item(item: dict) -> None:
         'time': 0.0,
         'duration': details.get('duration', 0.0),
         'volume': playback_state['volume'],
-        'current': {
-            'id': item['id'],
-            'title': details.get('title'),
-            'thumbnail': details.get('thumbnail'),
-            'source': details.get('source'),
-        }
+        'current': current_payload
     })
 
 
@@ -481,7 +732,7 @@ def play_next() -> None:
 
     # No next item, clear current
     playback_state['current_id'] = None
-    playback_state['current_details'] = None
+    playback_state['current_payload'] = None
     socketio.emit('status', {
         'paused': True,
         'time': 0.0,
@@ -493,12 +744,24 @@ def play_next() -> None:
 
 @app.route('/')
 def index():
-    return render_template('index.html', queue_items=queue_items)
+    return render_template('index.html', queue_items=_queue_snapshot)
 
 
 @app.route('/queue')
 def queue_partial():
-    return render_template('queue.html', queue_items=queue_items)
+    global _queue_render_cache
+    version = _queue_version
+    etag = f'{_queue_epoch}-{version}'
+    headers = {'ETag': f'W/"{etag}"', 'Cache-Control': 'no-cache'}
+    if request.if_none_match.contains_weak(etag):
+        return ('', 304, headers)
+    
+    # Only re-render when the queue changed since the last render
+    cached_version, body = _queue_render_cache
+    if cached_version != version:
+        body = render_template('queue.html', queue_items=_queue_snapshot)
+        _queue_render_cache = (version, body)
+    return (body, 200, headers)
 
 
 @app.post('/submit')
@@ -513,7 +776,7 @@ def submit_url():
         'status': 'loading',
         'details': None,
     }
-    queue_items.append(item)  # Add to end of queue
+    queue_append(item)  # Add to end of queue
     submission_queue.put({'id': item_id, 'url': url})
     # Return a single-item partial to insert at the end of the queue
     return render_template('queue.html', queue_items=[item])
@@ -527,7 +790,7 @@ def control():
     elif action == 'stop':
         mpv_command(['stop'])
         playback_state['current_id'] = None
-        playback_state['current_details'] = None
+        playback_state['current_payload'] = None
         socketio.emit('status', {
             'paused': True,
             'time': 0.0,
@@ -566,9 +829,9 @@ def seek():
 @app.post('/clear-queue')
 def clear_queue():
     global queue_items
-    queue_items.clear()
+    queue_clear()
     playback_state['current_id'] = None
-    playback_state['current_details'] = None
+    playback_state['current_payload'] = None
     mpv_command(['stop'])
     socketio.emit('queue_cleared')
     return ('', 204)
@@ -586,17 +849,15 @@ def play_now():
     idx = find_item_index_by_id(item_id)
     if idx >= 0 and queue_items[idx].get('details'):
         # Move item to front of queue
-        item = queue_items.pop(idx)
-        queue_items.insert(0, item)
+        item = queue_pop(idx)
+        queue_insert(0, item)
         # Play it immediately
         play_item(item)
         app.logger.info(f"Successfully moved and started playing item: {item_id}")
         
-        # Use a slight delay to ensure the WebSocket event is processed after the HTTP response
-        def emit_queue_update():
-            socketio.emit('queue_refreshed', {'items': queue_items})
-        
-        socketio.start_background_task(emit_queue_update)
+        # play_item already announced item_removed if it took the item off the queue
+        if find_item_index_by_id(item_id) == 0:
+            socketio.emit('queue_diff', {'op': 'move', 'id': item_id, 'from': idx, 'to': 0})
         return ('', 200)
     else:
         app.logger.error(f"Item not found or not ready: {item_id}")
@@ -614,28 +875,21 @@ def remove_item():
     
     idx = find_item_index_by_id(item_id)
     if idx >= 0:
-        removed_item = queue_items.pop(idx)
+        removed_item = queue_pop(idx)
         # If we removed the currently playing item, stop playback
         if playback_state['current_id'] == item_id:
             playback_state['current_id'] = None
-            playback_state['current_details'] = None
+            playback_state['current_payload'] = None
             mpv_command(['stop'])
-            
-            def emit_status_update():
-                socketio.emit('status', {
-                    'paused': True,
-                    'time': 0.0,
-                    'duration': 0.0,
-                    'volume': playback_state['volume'],
-                    'current': None
-                })
-            
-            socketio.start_background_task(emit_status_update)
-        
-        def emit_item_removed():
-            socketio.emit('item_removed', {'id': item_id})
+            socketio.emit('status', {
+                'paused': True,
+                'time': 0.0,
+                'duration': 0.0,
+                'volume': playback_state['volume'],
+                'current': None
+            })
         
-        socketio.start_background_task(emit_item_removed)
+        socketio.emit('item_removed', {'id': item_id})
         app.logger.info(f"Successfully removed item: {item_id}")
         return ('', 200)
     else:
@@ -645,25 +899,23 @@ def remove_item():
 
 @app.post('/shuffle-queue')
 def shuffle_queue():
-    import random
-    global queue_items
-    
-    # Keep currently playing item at the top if any
-    current_item = None
+    # Keep currently playing item at the top if any (swap, no list shifting)
+    start = 0
     if playback_state['current_id'] is not None:
         idx = find_item_index_by_id(playback_state['current_id'])
         if idx >= 0:
-            current_item = queue_items.pop(idx)
-    
-    # Shuffle the rest
-    random.shuffle(queue_items)
+            queue_items[0], queue_items[idx] = queue_items[idx], queue_items[0]
+            start = 1
     
-    # Put current item back at top if it exists
-    if current_item:
-        queue_items.insert(0, current_item)
+    # Shuffle the rest in place (Fisher-Yates over start..end)
+    for i in range(len(queue_items) - 1, start, -1):
+        j = random.randrange(start, i + 1)
+        queue_items[i], queue_items[j] = queue_items[j], queue_items[i]
+    rebuild_queue_index()
+    mark_queue_changed()
     
-    # Emit the full updated queue to refresh the frontend
-    socketio.emit('queue_refreshed', {'items': queue_items})
+    # Send only the new order; clients already have the item details
+    socketio.emit('queue_diff', {'op': 'order', 'ids': [item['id'] for item in queue_items]})
     return ('', 204)
 
 
@@ -679,13 +931,10 @@ def move_up():
     idx = find_item_index_by_id(item_id)
     if idx > 0:  # Can't move first item up
         # Swap with item above
-        queue_items[idx], queue_items[idx - 1] = queue_items[idx - 1], queue_items[idx]
+        queue_swap(idx, idx - 1)
         app.logger.info(f"Successfully moved item {item_id} up from position {idx} to {idx - 1}")
         
-        def emit_queue_update():
-            socketio.emit('queue_refreshed', {'items': queue_items})
-        
-        socketio.start_background_task(emit_queue_update)
+        socketio.emit('queue_diff', {'op': 'swap', 'i': idx, 'j': idx - 1, 'ids': [queue_items[idx]['id'], item_id]})
         return ('', 200)
     else:
         app.logger.warning(f"Item {item_id} is already at the top of the queue")
@@ -702,15 +951,12 @@ def move_down():
     app.logger.info(f"Move down requested for item: {item_id}")
     
     idx = find_item_index_by_id(item_id)
-    if idx < len(queue_items) - 1:  # Can't move last item down
+    if 0 <= idx < len(queue_items) - 1:  # Can't move last item down
         # Swap with item below
-        queue_items[idx], queue_items[idx + 1] = queue_items[idx + 1], queue_items[idx]
+        queue_swap(idx, idx + 1)
         app.logger.info(f"Successfully moved item {item_id} down from position {idx} to {idx + 1}")
         
-        def emit_queue_update():
-            socketio.emit('queue_refreshed', {'items': queue_items})
-        
-        socketio.start_background_task(emit_queue_update)
+        socketio.emit('queue_diff', {'op': 'swap', 'i': idx, 'j': idx + 1, 'ids': [queue_items[idx]['id'], item_id]})
         return ('', 200)
     else:
         app.logger.warning(f"Item {item_id} is already at the bottom of the queue")
@@ -744,11 +990,10 @@ def reorder_queue():
         app.logger.info(f"Reordering queue: {old_index} -> {new_index}, queue length: {len(queue_items)}")
         
         if 0 <= old_index < len(queue_items) and 0 <= new_index < len(queue_items):
-            item = queue_items.pop(old_index)
-            queue_items.insert(new_index, item)
+            item = queue_pop(old_index)
+            queue_insert(new_index, item)
             app.logger.info(f"Successfully reordered item '{item.get('id', 'unknown')}' from {old_index} to {new_index}")
-            # Emit the full updated queue to refresh the frontend
-            socketio.emit('queue_refreshed', {'items': queue_items})
+            socketio.emit('queue_diff', {'op': 'move', 'id': item['id'], 'from': old_index, 'to': new_index})
         else:
             app.logger.error(f"Index out of range: oldIndex={old_index}, newIndex={new_index}, queue length={len(queue_items)}")
             return ('', 400)
@@ -760,6 +1005,15 @@ def reorder_queue():
     return ('', 204)
 
 
+@socketio.on('connect')
+def on_connect():
+    # A (re)connecting client may have missed queue_diff events, send it the full queue
+    emit('queue_refreshed', {'items': _queue_snapshot})
+    # Status is only broadcast on change, so catch this client up with the latest one
+    if _last_status is not None:
+        emit('status', _last_status)
+
+
 @app.post('/toggle-autoplay')
 def toggle_autoplay():
     global autoplay_enabled
@@ -788,10 +1042,10 @@ def search_music():
         app.logger.info(f"Searching for: {query}")
         
         # Make request to Cloud Function
-        resp = requests.post(CLOUD_FUNCTION_URL, json={'query': query}, timeout=10)
+        resp = cloud_session.post(CLOUD_FUNCTION_URL, json={'query': query}, timeout=10)
         
         if resp.status_code == 200:
-            search_data = resp.json()
+            search_data = orjson.loads(resp.content)
             app.logger.info(f"Search returned {len(search_data.get('results', []))} results")
             return jsonify(search_data)
         else:
@@ -803,22 +1057,26 @@ def search_music():
         return jsonify({'error': 'Search failed'}), 500
 
 
-@app.get('/debug-queue')
-def debug_queue():
-    """Debug endpoint to see current queue state"""
-    global mpv_process
+_debug_queue_generations = itertools.count(1)  # Numbers the /debug-queue renders for their ETags
+
+
+@functools.lru_cache(maxsize=1)
+def render_debug_queue(key):
+    """Serialize the /debug-queue payload, key holds everything it depends on"""
+    _version, mpv_pid, mpv_exit_code, socket_exists, _autoplay, _playback = key
     
     mpv_status = "Not started"
-    if mpv_process:
-        if mpv_process.poll() is None:
-            mpv_status = f"Running (PID: {mpv_process.pid})"
+    if mpv_pid:
+        if mpv_exit_code is None:
+            mpv_status = f"Running (PID: {mpv_pid})"
         else:
-            mpv_status = f"Dead (exit code: {mpv_process.poll()})"
+            mpv_status = f"Dead (exit code: {mpv_exit_code})"
     
+    items = _queue_snapshot
     debug_info = {
         'mpv_status': mpv_status,
-        'mpv_socket_exists': os.path.exists(MPV_SOCKET),
-        'queue_length': len(queue_items),
+        'mpv_socket_exists': socket_exists,
+        'queue_length': len(items),
         'queue_items': [
             {
                 'id': item['id'],
@@ -826,12 +1084,32 @@ def debug_queue():
                 'has_details': bool(item.get('details')),
                 'title': item.get('details', {}).get('title', 'No title') if item.get('details') else 'No details'
             }
-            for item in queue_items
+            for item in items
         ],
         'playback_state': playback_state,
         'autoplay_enabled': autoplay_enabled
     }
-    return jsonify(debug_info)
+    return f'{_queue_epoch}-{next(_debug_queue_generations)}', orjson.dumps(debug_info)
+
+
+@app.get('/debug-queue')
+def debug_queue():
+    """Debug endpoint to see current queue state"""
+    # Health probes hit this a lot, only re-serialize when something in the payload changed
+    key = (
+        _queue_version,
+        mpv_process.pid if mpv_process else 0,
+        mpv_process.poll() if mpv_process else None,
+        os.path.exists(MPV_SOCKET),
+        autoplay_enabled,
+        (playback_state['current_id'], playback_state['paused'], playback_state['time'],
+         playback_state['duration'], playback_state['volume']),
+    )
+    etag, body = render_debug_queue(key)
+    headers = {'ETag': f'W/"{etag}"', 'Cache-Control': 'no-cache'}
+    if request.if_none_match.contains_weak(etag):
+        return Response(status=304, headers=headers)
+    return Response(body, mimetype='application/json', headers=headers)
 
 
 @app.get('/debug-audio')
@@ -866,113 +1144,126 @@ def test_audio_config():
         })
 
 
-def submission_worker():
-    while True:
-        try:
-            task = submission_queue.get()
-        except Exception:
-            continue
-        if not task:
-            continue
-        item_id = task.get('id')
-        url = task.get('url')
-        try:
-            app.logger.info(f"Processing URL: {url} for item: {item_id}")
-            resp = requests.post(CLOUD_FUNCTION_URL, json={'url': url}, timeout=30)
-            if resp.status_code == 200:
-                details = resp.json()
-                app.logger.info(f"Successfully got details for {item_id}: {details.get('title', 'Unknown')}")
-                # Update item
-                idx = find_item_index_by_id(item_id)
-                if idx >= 0:
-                    queue_items[idx]['details'] = details
-                    queue_items[idx]['status'] = 'ready'
-                    app.logger.info(f"Updated item {item_id} status to 'ready'")
-                    socketio.emit('queue_update', {'id': item_id, 'item': queue_items[idx]})
-                    # Autoplay if nothing is playing and autoplay is enabled
-                    if autoplay_enabled and playback_state['current_id'] is None:
+def process_submission(item_id: str, url: str) -> None:
+    """Fetch details for one queued URL from the Cloud Function and update its item"""
+    try:
+        app.logger.info(f"Processing URL: {url} for item: {item_id}")
+        resp = cloud_session.post(CLOUD_FUNCTION_URL, json={'url': url}, timeout=30)
+        if resp.status_code == 200:
+            details = orjson.loads(resp.content)
+            app.logger.info(f"Successfully got details for {item_id}: {details.get('title', 'Unknown')}")
+            # Update item
+            idx = find_item_index_by_id(item_id)
+            if idx >= 0:
+                queue_items[idx]['details'] = details
+                queue_items[idx]['status'] = 'ready'
+                mark_queue_changed()
+                app.logger.info(f"Updated item {item_id} status to 'ready'")
+                socketio.emit('queue_update', {'id': item_id, 'item': queue_items[idx]})
+                # Autoplay if nothing is playing and autoplay is enabled
+                with autoplay_lock:
+                    # Another submission may have changed the queue while we waited
+                    idx = find_item_index_by_id(item_id)
+                    if autoplay_enabled and playback_state['current_id'] is None and idx >= 0:
                         app.logger.info(f"Starting autoplay for item {item_id}")
                         play_item(queue_items[idx])
                     else:
                         app.logger.info(f"Autoplay not triggered: autoplay_enabled={autoplay_enabled}, current_id={playback_state['current_id']}")
-                else:
-                    app.logger.error(f"Item {item_id} not found in queue after processing")
             else:
-                app.logger.error(f"Cloud function returned status {resp.status_code} for {item_id}")
-                idx = find_item_index_by_id(item_id)
-                if idx >= 0:
-                    queue_items[idx]['status'] = 'error'
-                    socketio.emit('queue_update', {'id': item_id, 'item': queue_items[idx]})
-                    
-                    # If it's a 500 error, show the cookies update modal
-                    if resp.status_code == 500:
-                        socketio.emit('show_cookies_modal', {'url': url, 'item_id': item_id})
-        except Exception as e:
-            app.logger.error(f"Error processing {item_id}: {e}")
+                app.logger.error(f"Item {item_id} not found in queue after processing")
+        else:
+            app.logger.error(f"Cloud function returned status {resp.status_code} for {item_id}")
             idx = find_item_index_by_id(item_id)
             if idx >= 0:
                 queue_items[idx]['status'] = 'error'
+                mark_queue_changed()
                 socketio.emit('queue_update', {'id': item_id, 'item': queue_items[idx]})
-                
-                # If it's a timeout or connection error, also suggest cookies update
-                error_msg = str(e).lower()
-                if any(keyword in error_msg for keyword in ['timeout', 'connection', 'ssl', 'certificate']):
+                    
+                # If it's a 500 error, show the cookies update modal
+                if resp.status_code == 500:
                     socketio.emit('show_cookies_modal', {'url': url, 'item_id': item_id})
-        finally:
-            try:
-                submission_queue.task_done()
-            except Exception:
-                pass
+    except Exception as e:
+        app.logger.error(f"Error processing {item_id}: {e}")
+        idx = find_item_index_by_id(item_id)
+        if idx >= 0:
+            queue_items[idx]['status'] = 'error'
+            mark_queue_changed()
+            socketio.emit('queue_update', {'id': item_id, 'item': queue_items[idx]})
+                
+            # If it's a timeout or connection error, also suggest cookies update
+            error_msg = str(e).lower()
+            if any(keyword in error_msg for keyword in ['timeout', 'connection', 'ssl', 'certificate']):
+                socketio.emit('show_cookies_modal', {'url': url, 'item_id': item_id})
+    finally:
+        try:
+            submission_queue.task_done()
+        except Exception:
+            pass
+
+
+def submission_worker():
+    while True:
+        try:
+            task = submission_queue.get()
+        except Exception:
+            continue
+        if not task:
+            continue
+        # Blocks while all pool slots are busy, the rest stays queued
+        submission_pool.spawn_n(process_submission, task.get('id'), task.get('url'))
 
 
 def poll_mpv_state():
+    global _last_status, _last_status_key
     while True:
+        interval = 0.5
         try:
-            # First check if MPV is idle to avoid unnecessary property queries
-            idle_active = bool(mpv_get('idle-active')) if mpv_get('idle-active') is not None else False
+            # Read everything in one round trip; the idle/unavailable cases are handled below
+            props = mpv_get_many(['idle-active', 'pause', 'time-pos', 'duration', 'volume'])
+            idle_active = bool(props['idle-active'])
             
-            # Only query playback properties if something is loaded
             if not idle_active:
-                paused = bool(mpv_get('pause')) if mpv_get('pause') is not None else playback_state['paused']
-                time_pos = float(mpv_get('time-pos') or 0.0)
-                duration = float(mpv_get('duration') or 0.0)
-                
-                playback_state['paused'] = paused
-                playback_state['time'] = time_pos
-                playback_state['duration'] = duration
+                paused = bool(props['pause']) if props['pause'] is not None else playback_state['paused']
+                time_pos = float(props['time-pos'] or 0.0)
+                duration = float(props['duration'] or 0.0)
             else:
                 # When idle, set appropriate default values
-                playback_state['paused'] = True
-                playback_state['time'] = 0.0
-                playback_state['duration'] = 0.0
+                paused = True
+                time_pos = 0.0
+                duration = 0.0
+            
+            playback_state['paused'] = paused
+            playback_state['time'] = time_pos
+            playback_state['duration'] = duration
             
             # Volume can be queried even when idle
-            volume = float(mpv_get('volume') or playback_state['volume'])
+            volume = float(props['volume'] or playback_state['volume'])
             playback_state['volume'] = volume
 
             # Detect end of file: mpv becomes idle after finishing the file
             if idle_active and playback_state['current_id'] is not None and not playback_state['paused']:
                 play_next()
 
-            # Use stored current details instead of searching queue
-            current_details = playback_state.get('current_details')
-            
-            socketio.emit('status', {
+            # Nothing the UI shows changed since the last tick, skip the emit
+            status_key = (paused, round(time_pos, 1), round(duration, 1), round(volume, 1), playback_state['current_id'])
+            if status_key == _last_status_key:
+                if idle_active and paused:
+                    interval = 1.0  # Idle server, nothing can change without an HTTP request
+                continue
+
+            _last_status = {
                 'paused': paused,
                 'time': time_pos,
                 'duration': duration,
                 'volume': volume,
-                'current': {
-                    'id': playback_state['current_id'],
-                    'title': current_details.get('title') if current_details else None,
-                    'thumbnail': current_details.get('thumbnail') if current_details else None,
-                    'source': current_details.get('source') if current_details else None,
-                } if playback_state['current_id'] and current_details else None
-            })
+                'current': playback_state['current_payload']
+            }
+            _last_status_key = status_key
+            socketio.emit('status', _last_status)
         except Exception:
             pass
         finally:
-            time.sleep(0.5)
+            socketio.sleep(interval)
 
 
 def start_background_threads():
@@ -980,8 +1271,9 @@ def start_background_threads():
     if not start_mpv():
         app.logger.error("Failed to start MPV - music playback will not work!")
     
-    threading.Thread(target=submission_worker, daemon=True).start()
-    threading.Thread(target=poll_mpv_state, daemon=True).start()
+    # Run as tasks of the configured async mode (green threads under eventlet)
+    socketio.start_background_task(submission_worker)
+    socketio.start_background_task(poll_mpv_state)
 
 
 start_background_threads()
@@ -1,74 +1,198 @@
-import functions_framework, logging, json, yt_dlp
-from flask import Request, jsonify
+import functions_framework, logging, orjson, gzip, threading, atexit, hashlib, functools
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+from cachetools import TTLCache
+from flask import Request, request as current_request
 
 logging.basicConfig(level=logging.INFO)
 COOKIES_FILE = 'cookies.txt'
-YDL_OPTS = {'format': 'bestaudio/best', 'quiet': True, 'no_warnings': True, 'cookiefile': COOKIES_FILE, 'noplaylist': True, 'forcejson': True}
+YDL_OPTS = {'format': 'bestaudio/best', 'quiet': True, 'no_warnings': True, 'cookiefile': COOKIES_FILE, 'noplaylist': True, 'skip_download': True,
+            'extractor_args': {'youtube': {'player_skip': ['webpage', 'configs']}}}  # Skip player requests that extraction doesn't need
 SEARCH_OPTS = {'quiet': True, 'no_warnings': True, 'cookiefile': COOKIES_FILE, 'noplaylist': True, 'extract_flat': True}
+CORS_HEADERS = {'Access-Control-Allow-Origin': '*'}
+PREFLIGHT_HEADERS = {**CORS_HEADERS, 'Access-Control-Allow-Methods': 'POST', 'Access-Control-Allow-Headers': 'Content-Type', 'Access-Control-Max-Age': '3600'}
+
+# One YoutubeDL per option set, kept across warm invocations so the HTTP connection to YouTube is reused.
+# yt-dlp isn't thread-safe, so each instance is only used under its lock. They're created by the first request
+# that needs them, importing yt-dlp's hundreds of extractor modules isn't worth it for cold starts and pre-flights.
+_YDL, _YDL_LOCK = None, threading.Lock()
+_YDL_SEARCH, _YDL_SEARCH_LOCK = None, threading.Lock()
+
+def _new_ydl(opts):
+    """Create a YoutubeDL that is closed at exit, importing yt-dlp on first use"""
+    import yt_dlp
+    ydl = yt_dlp.YoutubeDL(opts)
+    atexit.register(ydl.close)
+    return ydl
+
+def _ydl():
+    """Shared YoutubeDL for URL extraction, only call it while holding _YDL_LOCK"""
+    global _YDL
+    if _YDL is None:
+        _YDL = _new_ydl(YDL_OPTS)
+    return _YDL
+
+def _ydl_search():
+    """Shared YoutubeDL for searches, only call it while holding _YDL_SEARCH_LOCK"""
+    global _YDL_SEARCH
+    if _YDL_SEARCH is None:
+        _YDL_SEARCH = _new_ydl(SEARCH_OPTS)
+    return _YDL_SEARCH
+
+# Recent results, so repeat requests skip yt-dlp entirely. audioUrl expires after a few hours, 5 minutes stays well within that.
+_URL_CACHE = TTLCache(maxsize=512, ttl=300)  # sha256 of the URL -> song details
+_SEARCH_CACHE = TTLCache(maxsize=256, ttl=120)  # lowercased query -> results, empty ones included
+_FAILED_SEARCH_CACHE = TTLCache(maxsize=256, ttl=30)  # lowercased queries whose search just failed, so retries don't hammer YouTube
+_CACHE_LOCK = threading.RLock()
+
+# Search prefetch extracts the results in parallel, each pool thread gets its own YoutubeDL
+PREFETCH_TIMEOUT = 3
+_PREFETCH_POOL = ThreadPoolExecutor(max_workers=5, thread_name_prefix='prefetch')
+_prefetch_local = threading.local()
+atexit.register(_PREFETCH_POOL.shutdown, wait=False, cancel_futures=True)
+
+def cors(view):
+    """Answer CORS pre-flights before the view runs, so they skip body parsing and everything after it"""
+    @functools.wraps(view)
+    def wrapper(request):
+        if request.method == 'OPTIONS':
+            return ('', 204, PREFLIGHT_HEADERS)
+        return view(request)
+    return wrapper
+
+def json_response(obj, status, headers):
+    """Compact JSON response, gzipped when the client accepts it"""
+    body = orjson.dumps(obj)
+    headers = {**headers, 'Content-Type': 'application/json', 'Vary': 'Accept-Encoding'}
+    if 'gzip' in current_request.headers.get('Accept-Encoding', ''):
+        body = gzip.compress(body)
+        headers['Content-Encoding'] = 'gzip'
+    return (body, status, headers)
+
+def _url_cache_key(video_url):
+    return hashlib.sha256(video_url.encode()).hexdigest()
+
+def _extract_song_details(ydl, video_url):
+    """Run a full extraction and return the details the player needs"""
+    info = ydl.extract_info(video_url, download=False)
+    if not info or 'url' not in info: raise ValueError('Could not extract audio stream.')
+    return {'title': info.get('title', 'Unknown'), 'thumbnail': info.get('thumbnail'), 'audioUrl': info['url'], 'duration': info.get('duration', 0), 'source': video_url}
 
 @functions_framework.http
+@cors
 def get_youtube_details(request: Request):
-    headers = {'Access-Control-Allow-Origin': '*'}
-    if request.method == 'OPTIONS':
-        return ('', 204, {'Access-Control-Allow-Origin': '*', 'Access-Control-Allow-Methods': 'POST', 'Access-Control-Allow-Headers': 'Content-Type', 'Access-Control-Max-Age': '3600'})
-    
-    request_json = request.get_json(silent=True)
-    if not request_json:
-        return (jsonify({'error': 'Invalid request.'}), 400, headers)
+    headers = CORS_HEADERS
+    try:
+        request_json = orjson.loads(request.get_data() or b'null')
+    except orjson.JSONDecodeError:
+        request_json = None
+    if not request_json or not isinstance(request_json, dict):
+        return json_response({'error': 'Invalid request.'}, 400, headers)
     
     # Handle search requests
     if 'query' in request_json:
-        return handle_search(request_json['query'], headers)
+        return handle_search(request_json['query'], headers, prefetch=bool(request_json.get('prefetch')))
     
     # Handle URL processing requests
-    if 'url' not in request_json:
-        return (jsonify({'error': 'Invalid request.'}), 400, headers)
+    if not isinstance(request_json.get('url'), str):
+        return json_response({'error': 'Invalid request.'}, 400, headers)
     
-    video_url = request_json['url']
+    # Stripped so the same URL with stray whitespace shares a cache entry
+    video_url = request_json['url'].strip()
+    cache_key = _url_cache_key(video_url)
+    with _CACHE_LOCK:
+        song_details = _URL_CACHE.get(cache_key)
+    if song_details:
+        logging.info(f'Cache hit for URL: {video_url}')
+        return json_response(song_details, 200, headers)
     logging.info(f'Processing URL: {video_url}')
     
     try:
-        with yt_dlp.YoutubeDL(YDL_OPTS) as ydl:
-            info = ydl.extract_info(video_url, download=False)
-            if not info or 'url' not in info: raise ValueError('Could not extract audio stream.')
-            song_details = {'title': info.get('title', 'Unknown'), 'thumbnail': info.get('thumbnail'), 'audioUrl': info['url'], 'duration': info.get('duration', 0), 'source': video_url}
-            return (jsonify(song_details), 200, headers)
+        with _YDL_LOCK:
+            song_details = _extract_song_details(_ydl(), video_url)
+        with _CACHE_LOCK:
+            _URL_CACHE[cache_key] = song_details
+        return json_response(song_details, 200, headers)
     except Exception as e:
         logging.error(f'Error processing {video_url}: {e}')
-        return (jsonify({'error': 'Failed to process URL.'}), 500, headers)
+        return json_response({'error': 'Failed to process URL.'}, 500, headers)
+
+def _prefetch_song_details(video_url):
+    """Extract details for a search result on a prefetch thread and cache them for the follow-up request"""
+    cache_key = _url_cache_key(video_url)
+    with _CACHE_LOCK:
+        song_details = _URL_CACHE.get(cache_key)
+    if song_details:
+        return song_details
+    ydl = getattr(_prefetch_local, 'ydl', None)
+    if ydl is None:
+        ydl = _prefetch_local.ydl = _new_ydl(YDL_OPTS)
+    song_details = _extract_song_details(ydl, video_url)
+    with _CACHE_LOCK:
+        _URL_CACHE[cache_key] = song_details
+    return song_details
+
+def prefetch_results(results):
+    """Fill search results with full details in parallel, results not ready within PREFETCH_TIMEOUT are returned as they are"""
+    results = [dict(result) for result in results]
+    futures = {_PREFETCH_POOL.submit(_prefetch_song_details, result['url']): result for result in results}
+    try:
+        for future in as_completed(futures, timeout=PREFETCH_TIMEOUT):
+            try:
+                song_details = future.result()
+            except Exception as e:
+                logging.warning(f'Prefetch failed for {futures[future]["url"]}: {e}')
+                continue
+            futures[future].update({k: v for k, v in song_details.items() if v and k != 'source'})
+    except FuturesTimeout:
+        logging.warning(f'Prefetch timed out for {sum(not f.done() for f in futures)} results')
+    return results
 
-def handle_search(query, headers):
-    """Handle YouTube search requests"""
-    if not query or len(query.strip()) < 2:
-        return (jsonify({'error': 'Query too short.'}), 400, headers)
+def handle_search(query, headers, prefetch=False):
+    """Handle YouTube search requests, prefetch also extracts the full details of every result"""
+    query = (query or '').strip()
+    if len(query) < 2:
+        return json_response({'error': 'Query too short.'}, 400, headers)
     
-    query = query.strip()
+    cache_key = query.lower()
+    with _CACHE_LOCK:
+        results = _SEARCH_CACHE.get(cache_key)
+        recently_failed = cache_key in _FAILED_SEARCH_CACHE
+    if results is not None:
+        logging.info(f'Cache hit for search: {query}')
+        return json_response({'results': prefetch_results(results) if prefetch else results}, 200, headers)
+    if recently_failed:
+        logging.info(f'Search failed recently, not retrying yet: {query}')
+        return json_response({'error': 'Search failed.'}, 500, headers)
     logging.info(f'Searching for: {query}')
     
     try:
         search_query = f"ytsearch5:{query}"  # Search for top 5 results
-        with yt_dlp.YoutubeDL(SEARCH_OPTS) as ydl:
-            search_results = ydl.extract_info(search_query, download=False)
-            
-            if not search_results or 'entries' not in search_results:
-                return (jsonify({'results': []}), 200, headers)
-            
-            results = []
-            for entry in search_results['entries'][:5]:  # Limit to 5 results
-                if entry:
-                    result = {
-                        'id': entry.get('id', ''),
-                        'title': entry.get('title', 'Unknown'),
-                        'url': f"https://www.youtube.com/watch?v={entry.get('id', '')}",
-                        'thumbnail': entry.get('thumbnail') or f"https://img.youtube.com/vi/{entry.get('id', '')}/mqdefault.jpg",
-                        'duration': entry.get('duration', 0),
-                        'uploader': entry.get('uploader', 'Unknown')
-                    }
-                    results.append(result)
-            
-            logging.info(f'Found {len(results)} results for: {query}')
-            return (jsonify({'results': results}), 200, headers)
-            
+        with _YDL_SEARCH_LOCK:
+            search_results = _ydl_search().extract_info(search_query, download=False)
+        
+        results = []
+        entries = search_results.get('entries') if search_results else None
+        for entry in (entries or [])[:5]:  # Limit to 5 results
+            if entry:
+                result = {
+                    'id': entry.get('id', ''),
+                    'title': entry.get('title', 'Unknown'),
+                    'url': f"https://www.youtube.com/watch?v={entry.get('id', '')}",
+                    'thumbnail': entry.get('thumbnail') or f"https://img.youtube.com/vi/{entry.get('id', '')}/mqdefault.jpg",
+                    'duration': entry.get('duration', 0),
+                    'uploader': entry.get('uploader', 'Unknown')
+                }
+                results.append(result)
+        
+        logging.info(f'Found {len(results)} results for: {query}')
+        with _CACHE_LOCK:
+            _SEARCH_CACHE[cache_key] = results
+        if prefetch:
+            results = prefetch_results(results)
+        return json_response({'results': results}, 200, headers)
+        
     except Exception as e:
         logging.error(f'Error searching for {query}: {e}')
-        return (jsonify({'error': 'Search failed.'}), 500, headers)
\ No newline at end of file
+        with _CACHE_LOCK:
+            _FAILED_SEARCH_CACHE[cache_key] = True
+        return json_response({'error': 'Search failed.'}, 500, headers)
\ No newline at end of file
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+MPV startup and socket probe shared by the diagnostic scripts
+"""
+
+import os
+import subprocess
+import time
+import json
+import socket
+import select
+import signal
+from typing import Optional
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None  # Falls back to polling for the socket
+
+IDLE_ACTIVE_REQUEST = b'{"command":["get_property","idle-active"]}\n'
+
+def watch_socket_dir(socket_path):
+    """Start watching for socket_path to be created, None when inotify_simple isn't installed"""
+    if INotify is None:
+        return None
+    inotify = INotify()
+    inotify.add_watch(os.path.dirname(socket_path), flags.CREATE)
+    return inotify
+
+def wait_for_socket(process, socket_path, inotify, timeout):
+    """Block until MPV creates socket_path, returns False if it exits or the timeout passes first"""
+    socket_name = os.path.basename(socket_path)
+    # SIGCHLD writes to a self-pipe so select() also wakes up the moment MPV exits
+    wake_r, wake_w = os.pipe()
+    os.set_blocking(wake_w, False)
+    previous_handler = signal.signal(signal.SIGCHLD, lambda *_: os.write(wake_w, b'x'))
+    deadline = time.monotonic() + timeout
+    delay = 0.005
+    try:
+        while process.poll() is None:
+            if os.path.exists(socket_path):
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if inotify:
+                readable, _, _ = select.select([inotify, wake_r], [], [], remaining)
+                if inotify in readable and any(event.name == socket_name for event in inotify.read(timeout=0)):
+                    return True
+            else:
+                # Without inotify the socket itself still has to be polled for, backing off from 5ms to 100ms
+                select.select([wake_r], [], [], min(remaining, delay))
+                delay = min(delay * 2, 0.1)
+        return False
+    finally:
+        signal.signal(signal.SIGCHLD, previous_handler)
+        os.close(wake_r)
+        os.close(wake_w)
+        if inotify:
+            inotify.close()
+
+def kill_previous_mpv(pid_file):
+    """SIGTERM the MPV a previous run left behind, returns whether there was one"""
+    try:
+        with open(pid_file) as f:
+            pid = int(f.read().strip())
+        # The PID may have been reused since, only signal it if it's still an MPV
+        with open(f'/proc/{pid}/comm') as f:
+            if f.read().strip() != 'mpv':
+                return False
+        os.kill(pid, signal.SIGTERM)
+        return True
+    except (OSError, ValueError):
+        return False
+
+def stop_mpv(process, pid_file):
+    """SIGTERM the MPV this run started if it's still running, remove its PID file and return its (stdout, stderr)"""
+    if process.poll() is None:
+        os.kill(process.pid, signal.SIGTERM)
+    output = process.communicate(timeout=5)
+    try:
+        os.remove(pid_file)
+    except FileNotFoundError:
+        pass
+    return output
+
+def probe_socket(socket_path, timeout=2.0):
+    """Ask MPV for idle-active over its IPC socket and return the parsed reply"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.settimeout(timeout)
+        s.connect(socket_path)
+        s.sendall(IDLE_ACTIVE_REQUEST)
+        with s.makefile('rb') as lines:
+            # MPV can send events ahead of the reply, skip them
+            for line in lines:
+                message = json.loads(line)
+                if 'event' not in message:
+                    return message
+    raise ConnectionError("MPV closed the socket without replying")
+
+def spawn_mpv_and_probe(mpv_cmd, socket_path, timeout=3.0) -> Optional[dict]:
+    """Start MPV, wait for its IPC socket and probe it, returns MPV's reply or None if any step failed"""
+    pid_file = os.path.splitext(socket_path)[0] + '_mpv.pid'
+
+    # Clean up the process and socket a previous run may have left behind
+    if kill_previous_mpv(pid_file):
+        time.sleep(0.5)
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+
+    print(f"Starting MPV with: {' '.join(mpv_cmd)}")
+
+    # Start MPV, watching for the socket from before it starts
+    inotify = watch_socket_dir(socket_path)
+    try:
+        process = subprocess.Popen(
+            mpv_cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True
+        )
+    except OSError as e:
+        if inotify:
+            inotify.close()
+        print(f"❌ Could not start MPV: {e}")
+        return None
+    with open(pid_file, 'w') as f:
+        f.write(str(process.pid))
+
+    print(f"MPV started with PID: {process.pid}")
+
+    response = None
+    try:
+        if wait_for_socket(process, socket_path, inotify, timeout):
+            print("✅ MPV socket created successfully!")
+            try:
+                response = probe_socket(socket_path)
+                print(f"✅ Communication successful: {response}")
+            except Exception as e:
+                print(f"❌ Communication error: {e}")
+        elif process.poll() is not None:
+            print(f"❌ MPV process died with exit code: {process.returncode}")
+        else:
+            print("❌ Socket was not created within timeout")
+    finally:
+        # Cleanup
+        stdout, stderr = stop_mpv(process, pid_file)
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+    if response is None:
+        print(f"STDOUT: {stdout}")
+        print(f"STDERR: {stderr}")
+    return response
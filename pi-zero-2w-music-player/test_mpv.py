@@ -6,10 +6,72 @@ Usage: python3 test_mpv.py
 
 import os
 import sys
-import time
-import json
+import re
 import subprocess
 import tempfile
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from mpv_test_common import spawn_mpv_and_probe
+
+@functools.lru_cache(maxsize=1)
+def _aplay_list():
+    """Result of aplay -l, run once per test run"""
+    return subprocess.run(['aplay', '-l'], capture_output=True, text=True, timeout=5)
+
+@functools.lru_cache(maxsize=1)
+def _alsa_cards():
+    """Return (card, device, lowercased card name) for every ALSA playback device"""
+    try:
+        result = _aplay_list()
+    except Exception:
+        return []
+    if result.returncode != 0:
+        return []
+    return [
+        (int(card), int(device), name.lower())
+        for card, name, device in re.findall(r'^card (\d+): (\S+).*?device (\d+):', result.stdout, re.MULTILINE)
+    ]
+
+# Read-only diagnostic commands, independent of each other so they run concurrently
+PROBES = {
+    'pactl': ['pactl', 'list', 'sinks', 'short'],
+    'mpv_version': ['mpv', '--version'],
+    'mpv_ao': ['mpv', '--ao=help'],
+}
+
+def start_probes(executor):
+    """Start aplay -l and every PROBES command on executor, returns futures of their CompletedProcess by name"""
+    probes = {
+        name: executor.submit(subprocess.run, cmd, capture_output=True, text=True, timeout=5)
+        for name, cmd in PROBES.items()
+    }
+    probes['aplay'] = executor.submit(_aplay_list)
+    return probes
+
+@functools.lru_cache(maxsize=1)
+def _read_cpuinfo() -> str:
+    """Lowercased /proc/cpuinfo, read once per run"""
+    with open('/proc/cpuinfo', 'r') as f:
+        return f.read().lower()
+
+@functools.lru_cache(maxsize=1)
+def _detect_pi():
+    """Return (is_raspberry_pi, rpi_model) from /proc/cpuinfo"""
+    is_raspberry_pi = False
+    rpi_model = "unknown"
+    try:
+        cpuinfo = _read_cpuinfo()
+        # More precise Raspberry Pi detection
+        is_raspberry_pi = ('raspberry pi' in cpuinfo or 'bcm2835' in cpuinfo or 'bcm2836' in cpuinfo or 'bcm2837' in cpuinfo or 'bcm2711' in cpuinfo) and 'arm' in cpuinfo
+        if is_raspberry_pi:
+            if 'pi zero' in cpuinfo:
+                rpi_model = 'zero'
+            elif 'raspberry pi' in cpuinfo:
+                rpi_model = 'standard'
+    except OSError:
+        pass
+    return is_raspberry_pi, rpi_model
 
 def check_system_info():
     """Check basic system information"""
@@ -18,10 +80,8 @@ def check_system_info():
     # Check if we're on Raspberry Pi
     is_raspberry_pi = False
     try:
-        with open('/proc/cpuinfo', 'r') as f:
-            cpuinfo = f.read().lower()
-            # More precise Raspberry Pi detection
-            is_raspberry_pi = ('raspberry pi' in cpuinfo or 'bcm2835' in cpuinfo or 'bcm2836' in cpuinfo or 'bcm2837' in cpuinfo or 'bcm2711' in cpuinfo) and 'arm' in cpuinfo
+        _read_cpuinfo()
+        is_raspberry_pi, _ = _detect_pi()
         print(f"Raspberry Pi detected: {is_raspberry_pi}")
     except Exception as e:
         print(f"Could not read /proc/cpuinfo: {e}")
@@ -41,16 +101,18 @@ def check_system_info():
     
     return is_raspberry_pi
 
-def check_audio_devices():
+def check_audio_devices(probes):
     """Check available audio devices"""
     print("\n=== Audio Devices ===")
     
     # Check ALSA devices
     try:
-        result = subprocess.run(['aplay', '-l'], capture_output=True, text=True, timeout=5)
+        result = probes['aplay'].result()
         if result.returncode == 0:
             print("ALSA devices:")
             print(result.stdout)
+            for card, device, name in _alsa_cards():
+                print(f"  {name}: hw:{card},{device}")
         else:
             print(f"aplay failed: {result.stderr}")
     except Exception as e:
@@ -58,7 +120,7 @@ def check_audio_devices():
     
     # Check PulseAudio
     try:
-        result = subprocess.run(['pactl', 'list', 'sinks', 'short'], capture_output=True, text=True, timeout=5)
+        result = probes['pactl'].result()
         if result.returncode == 0:
             print("PulseAudio sinks:")
             print(result.stdout)
@@ -67,12 +129,12 @@ def check_audio_devices():
     except Exception as e:
         print("PulseAudio not available")
 
-def check_mpv_installation():
+def check_mpv_installation(probes):
     """Check MPV installation and capabilities"""
     print("\n=== MPV Installation ===")
     
     try:
-        result = subprocess.run(['mpv', '--version'], capture_output=True, text=True, timeout=5)
+        result = probes['mpv_version'].result()
         if result.returncode == 0:
             version_line = result.stdout.split('\n')[0]
             print(f"MPV version: {version_line}")
@@ -85,7 +147,7 @@ def check_mpv_installation():
     
     # Check audio output options
     try:
-        result = subprocess.run(['mpv', '--ao=help'], capture_output=True, text=True, timeout=5)
+        result = probes['mpv_ao'].result()
         if result.returncode == 0:
             print("Available audio outputs:")
             print(result.stdout)
@@ -100,35 +162,11 @@ def test_mpv_basic():
     """Test basic MPV functionality"""
     print("\n=== Basic MPV Test ===")
     
-    # Create a test audio file (1 second of silence)
-    test_file = "/tmp/test_audio.wav"
-    try:
-        # Generate 1 second of silence
-        subprocess.run([
-            'ffmpeg', '-f', 'lavfi', '-i', 'anullsrc=r=44100:cl=stereo', 
-            '-t', '1', '-y', test_file
-        ], capture_output=True, timeout=10)
-        
-        if not os.path.exists(test_file):
-            print("Could not create test audio file with ffmpeg, trying alternative...")
-            # Try with sox if available
-            subprocess.run([
-                'sox', '-n', '-r', '44100', '-c', '2', test_file, 'trim', '0.0', '1.0'
-            ], capture_output=True, timeout=10)
-        
-        if not os.path.exists(test_file):
-            print("Could not create test audio file. Install ffmpeg or sox for testing.")
-            return False
-            
-    except Exception as e:
-        print(f"Could not create test file: {e}")
-        return False
-    
-    # Test MPV playback
+    # Test MPV playback of 1 second of silence generated by mpv's own lavfi source
     try:
         print("Testing MPV playback (should hear 1 second of silence)...")
         result = subprocess.run([
-            'mpv', '--no-video', '--really-quiet', test_file
+            'mpv', '--no-video', '--really-quiet', '--length=1', 'av://lavfi:anullsrc=r=44100:cl=stereo'
         ], timeout=5)
         
         if result.returncode == 0:
@@ -144,9 +182,6 @@ def test_mpv_basic():
     except Exception as e:
         print(f"✗ MPV playback failed: {e}")
         return False
-    finally:
-        if os.path.exists(test_file):
-            os.remove(test_file)
 
 def test_mpv_socket():
     """Test MPV with socket interface"""
@@ -154,25 +189,8 @@ def test_mpv_socket():
     
     socket_path = "/tmp/test_mpv.sock"
     
-    # Remove existing socket
-    if os.path.exists(socket_path):
-        os.remove(socket_path)
-    
     # Detect system type
-    is_raspberry_pi = False
-    rpi_model = "unknown"
-    try:
-        with open('/proc/cpuinfo', 'r') as f:
-            cpuinfo = f.read().lower()
-            # More precise Raspberry Pi detection
-            is_raspberry_pi = ('raspberry pi' in cpuinfo or 'bcm2835' in cpuinfo or 'bcm2836' in cpuinfo or 'bcm2837' in cpuinfo or 'bcm2711' in cpuinfo) and 'arm' in cpuinfo
-            if is_raspberry_pi:
-                if 'pi zero' in cpuinfo:
-                    rpi_model = 'zero'
-                elif 'raspberry pi' in cpuinfo:
-                    rpi_model = 'standard'
-    except:
-        pass
+    is_raspberry_pi, rpi_model = _detect_pi()
     
     # Build MPV command
     mpv_cmd = [
@@ -183,15 +201,12 @@ def test_mpv_socket():
     if is_raspberry_pi:
         print(f"Configuring for Raspberry Pi ({rpi_model})...")
         
-        # Check available audio devices first
-        audio_devices = ""
-        try:
-            result = subprocess.run(['aplay', '-l'], capture_output=True, text=True, timeout=3)
-            if result.returncode == 0:
-                audio_devices = result.stdout.lower()
-                print(f"Available audio devices:\n{result.stdout}")
-        except:
-            pass
+        # Check available audio devices first, from the aplay -l run during the device check
+        audio_devices = _alsa_cards()
+        if audio_devices:
+            print("Available audio devices:")
+            for card, device, name in audio_devices:
+                print(f"  {name}: hw:{card},{device}")
         
         # Since basic MPV test works, use automatic detection (no specific audio config)
         print("Using automatic audio detection (same as basic test that works)")
@@ -228,70 +243,8 @@ def test_mpv_socket():
                 '--audio-device=auto'
             ])
     
-    print(f"Starting MPV with: {' '.join(mpv_cmd)}")
-    
     try:
-        # Start MPV
-        process = subprocess.Popen(
-            mpv_cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        
-        # Wait for socket creation
-        socket_created = False
-        for i in range(20):  # Wait up to 2 seconds
-            time.sleep(0.1)
-            
-            if process.poll() is not None:
-                stdout, stderr = process.communicate()
-                print(f"✗ MPV died early (exit code: {process.returncode})")
-                print(f"STDOUT: {stdout}")
-                print(f"STDERR: {stderr}")
-                return False
-            
-            if os.path.exists(socket_path):
-                socket_created = True
-                break
-        
-        if not socket_created:
-            print("✗ MPV socket was not created")
-            process.terminate()
-            stdout, stderr = process.communicate(timeout=5)
-            print(f"STDOUT: {stdout}")
-            print(f"STDERR: {stderr}")
-            return False
-        
-        print("✓ MPV socket created successfully")
-        
-        # Test socket communication
-        try:
-            result = subprocess.run([
-                'socat', '-', f'UNIX-CONNECT:{socket_path}'
-            ], input='{"command":["get_property","idle-active"]}\n', 
-            text=True, capture_output=True, timeout=2)
-            
-            if result.returncode == 0 and result.stdout.strip():
-                response = json.loads(result.stdout.strip().split('\n')[-1])
-                print(f"✓ Socket communication successful: {response}")
-                success = True
-            else:
-                print(f"✗ Socket communication failed: {result.stderr}")
-                success = False
-        except Exception as e:
-            print(f"✗ Socket communication error: {e}")
-            success = False
-        
-        # Cleanup
-        process.terminate()
-        process.wait(timeout=5)
-        
-        if os.path.exists(socket_path):
-            os.remove(socket_path)
-        
-        return success
-        
+        return spawn_mpv_and_probe(mpv_cmd, socket_path, timeout=2.0) is not None
     except Exception as e:
         print(f"✗ MPV socket test failed: {e}")
         return False
@@ -301,14 +254,20 @@ def main():
     print("MPV Audio Diagnostic Tool for Raspberry Pi")
     print("=" * 50)
     
-    is_raspberry_pi = check_system_info()
-    check_audio_devices()
+    # The probes run in the background while the results are printed in order
+    with ThreadPoolExecutor(max_workers=len(PROBES) + 1) as executor:  # +1 for aplay -l
+        probes = start_probes(executor)
+        is_raspberry_pi = check_system_info()
+        check_audio_devices(probes)
+        mpv_installed = check_mpv_installation(probes)
     
-    if not check_mpv_installation():
+    if not mpv_installed:
         print("\n❌ MPV is not properly installed!")
         print("Install with: sudo apt install mpv")
         return 1
     
+    # Playback tests stay serial, they contend for the audio device
+    
     if not test_mpv_basic():
         print("\n❌ Basic MPV test failed!")
         print("Check audio configuration and permissions.")
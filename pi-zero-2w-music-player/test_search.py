@@ -6,6 +6,14 @@ Usage: python3 test_search.py
 
 import requests
 import json
+import atexit
+from requests.adapters import HTTPAdapter
+
+# Shared by all tests so connections are kept alive between requests to the same host
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(pool_maxsize=20))
+SESSION.mount('http://', HTTPAdapter(pool_maxsize=20))
+atexit.register(SESSION.close)
 
 def test_search_endpoint():
     """Test the local search endpoint"""
@@ -15,9 +23,9 @@ def test_search_endpoint():
     query = "never gonna give you up"
     
     try:
-        response = requests.post('http://localhost:5000/search', 
-                               json={'query': query}, 
-                               timeout=15)
+        response = SESSION.post('http://localhost:5000/search', 
+                              json={'query': query}, 
+                              timeout=15)
         
         if response.status_code == 200:
             data = response.json()
@@ -49,9 +57,9 @@ def test_cloud_function_direct():
     query = "rick astley"
     
     try:
-        response = requests.post(cloud_function_url, 
-                               json={'query': query}, 
-                               timeout=20)
+        response = SESSION.post(cloud_function_url, 
+                              json={'query': query}, 
+                              timeout=20)
         
         if response.status_code == 200:
             data = response.json()